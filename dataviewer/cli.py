@@ -4,27 +4,30 @@ Command line interface for dataviewer package.
 import click
 import os
 from .core import DataViewer
-import time
 import threading
-import itertools
 
-def echo_spinner(message, done_message=None):
-    """Create a spinner animation with a message."""
+SPINNER_FRAMES = ('⠋', '⠙', '⠹', '⠸', '⠼', '⠴', '⠦', '⠧', '⠇', '⠏')
+
+def echo_spinner(message):
+    """Create a spinner animation with a message.
+
+    Returns:
+        tuple: The spinner thread and an event which stops the spinner when set
+    """
+    done_event = threading.Event()
+
     def spinner_thread():
-        spinner = itertools.cycle(['⠋', '⠙', '⠹', '⠸', '⠼', '⠴', '⠦', '⠧', '⠇', '⠏'])
-        while not echo_spinner.done:
-            click.echo(f'\r{message} {next(spinner)}', nl=False)
-            time.sleep(0.1)
+        i = 0
+        while not done_event.wait(0.1):
+            click.echo(f'\r{message} {SPINNER_FRAMES[i]}', nl=False)
+            i = (i + 1) % len(SPINNER_FRAMES)
         click.echo('\r' + ' ' * (len(message) + 2))  # Clear the line
-        if done_message:
-            click.echo(done_message)
     
     # Start spinner in separate thread
     thread = threading.Thread(target=spinner_thread)
     thread.daemon = True  # Thread will exit when main program exits
-    echo_spinner.done = False
     thread.start()
-    return thread
+    return thread, done_event
 
 @click.command()
 @click.argument('dataset_url')
@@ -43,38 +46,47 @@ def main(dataset_url, split, prompt, force):
         # Create viewer based on available API keys
         viewer = DataViewer.from_environment()
         
-        # Set up progress callback
-        def progress_done():
-            echo_spinner.done = True
-            
-        viewer.set_progress_callback(progress_done)
-        
         # Load dataset with progress
         click.secho("\n📚 Loading dataset...", fg="blue")
-        viewer.load_dataset(dataset_url)
+        viewer.load_dataset(dataset_url, split=split)
         
         # Generate viewer with progress
         viewer_path = viewer._get_viewer_path(split)
-        if force or not os.path.exists(viewer_path):
+        viewer_exists = os.path.exists(viewer_path)
+        if force or not viewer_exists:
             click.secho("\n🤖 Generating Streamlit viewer...", fg="yellow")
             
-            # Start spinner animation in background
-            spinner_thread = echo_spinner(
-                "Waiting for AI to generate visualization code",
-                "✨ Viewer generated successfully!"
+            # Start spinner animation in background until the first chunk arrives
+            spinner_thread, spinner_done = echo_spinner(
+                "Waiting for AI to generate visualization code"
             )
+            viewer.set_progress_callback(spinner_done.set)
+            
+            def echo_chunk(text):
+                if not spinner_done.is_set():
+                    spinner_done.set()
+                    spinner_thread.join()
+                click.echo(text, nl=False)
             
-            # Generate the viewer
-            viewer.generate_viewer(split=split, extra_prompt=prompt, force=force)
+            viewer.set_stream_callback(echo_chunk)
             
-            # Wait for spinner animation to finish
-            spinner_thread.join()
+            # Generate the viewer, streaming the code to the terminal
+            try:
+                viewer.generate_viewer(
+                    split=split, extra_prompt=prompt, force=force, viewer_exists=viewer_exists
+                )
+            finally:
+                # Stop the spinner and clear its line, also on Ctrl-C or errors
+                spinner_done.set()
+                spinner_thread.join()
+            viewer_exists = True
+            click.echo("\n\n✨ Viewer generated successfully!")
         else:
             click.secho("\n📋 Using cached viewer", fg="green")
         
         # Run the viewer
         click.secho("\n🚀 Launching Streamlit...\n", fg="bright_green")
-        viewer.run_viewer(split=split, extra_prompt=prompt, force=force)
+        viewer.run_viewer(split=split, extra_prompt=prompt, viewer_exists=viewer_exists)
         
     except ValueError as e:
         raise click.ClickException(str(e))
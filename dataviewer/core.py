@@ -1,13 +1,82 @@
 """
 Core functionality for the dataviewer package.
 """
-import streamlit as st
-from datasets import load_dataset
+import functools
+import hashlib
 import json
 import os
-import re
+from pathlib import Path
+from string import Template
+import threading
 from .llm import Claude, GPT4
 
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "dataviewer")
+
+# Maximum number of characters shown for a string in the example instance
+MAX_EXAMPLE_STR_LENGTH = 200
+
+# Maximum number of characters of the dataset card included in the prompt
+MAX_README_LENGTH = 8000
+
+
+def _format_str(value):
+    if len(value) > MAX_EXAMPLE_STR_LENGTH:
+        return value[:MAX_EXAMPLE_STR_LENGTH] + "..."
+    return value
+
+
+def _format_sequence(value):
+    return f"[list with {len(value)} elements]"
+
+
+def _format_dict(value):
+    return "{dict with keys: " + ", ".join(map(str, value.keys())) + "}"
+
+
+def _format_other(value):
+    return f"[{type(value).__name__}]"
+
+
+# Formatters for the example instance, dispatched on the exact type of a value
+_FORMATTERS = {
+    str: _format_str,
+    int: str,
+    float: str,
+    bool: str,
+    type(None): str,
+    list: _format_sequence,
+    tuple: _format_sequence,
+    dict: _format_dict,
+}
+
+
+def _shorten_readme(text):
+    """Drop the YAML front matter of a dataset card and truncate it for the prompt."""
+    if text.startswith("---"):
+        _, sep, body = text[3:].partition("\n---\n")
+        if sep:
+            text = body
+    return text.strip()[:MAX_README_LENGTH]
+
+
+@functools.lru_cache(maxsize=1)
+def _default_llm():
+    """Create the language model for the available API key.
+    
+    The client is created once and shared by all later calls.
+    """
+    anthropic_key = os.getenv('ANTHROPIC_API_KEY')
+    if anthropic_key:
+        return Claude(anthropic_key)
+    openai_key = os.getenv('OPENAI_API_KEY')
+    if openai_key:
+        return GPT4(openai_key)
+    raise ValueError(
+        "No API keys found. Please set either ANTHROPIC_API_KEY "
+        "or OPENAI_API_KEY environment variable."
+    )
+
+
 class DataViewer:
     def __init__(self, llm=None):
         """Initialize DataViewer with a language model.
@@ -16,32 +85,96 @@ class DataViewer:
             llm: Language model instance (Claude or GPT4)
         """
         self.data = None
+        self.split = None
         self.dataset_name = None
+        self.dataset_readme = None
         self.llm = llm
         self.progress_callback = None
+        self.stream_callback = None
         
     @classmethod
     def from_environment(cls):
         """Create DataViewer instance based on available API keys."""
-        if os.getenv('ANTHROPIC_API_KEY'):
-            return cls(llm=Claude(os.getenv('ANTHROPIC_API_KEY')))
-        elif os.getenv('OPENAI_API_KEY'):
-            return cls(llm=GPT4(os.getenv('OPENAI_API_KEY')))
-        else:
-            raise ValueError(
-                "No API keys found. Please set either ANTHROPIC_API_KEY "
-                "or OPENAI_API_KEY environment variable."
-            )
+        return cls(llm=_default_llm())
 
-    def load_dataset(self, dataset_url):
+    def load_dataset(self, dataset_url, split=None):
         """Load a dataset from Hugging Face.
         
         Args:
             dataset_url (str): Dataset name or path on Hugging Face Hub
+            split (str): If given, only stream this split instead of
+                downloading the full dataset
         """
+        from datasets import load_dataset
+        
         self.dataset_name = dataset_url
-        self.data = load_dataset(dataset_url)
+        self.split = split
+        if split is None:
+            load_kwargs = {}
+        else:
+            load_kwargs = {"split": split, "streaming": True}
+        
+        # Fetch the dataset card in the background while the dataset loads.
+        # load_dataset stays on the calling thread so Ctrl-C and interactive
+        # prompts keep working; the daemon thread never blocks exit.
+        readme = {}
+        readme_thread = threading.Thread(
+            target=lambda: readme.update(text=self._load_readme(dataset_url)),
+            daemon=True
+        )
+        readme_thread.start()
+        self.data = load_dataset(dataset_url, **load_kwargs)
+        readme_thread.join()
+        self.dataset_readme = readme.get("text")
+
+    def _load_readme(self, dataset_url):
+        """Fetch the dataset card from the Hugging Face Hub.
+        
+        Args:
+            dataset_url (str): Dataset name or path on Hugging Face Hub
+            
+        Returns:
+            str: Content of the dataset card, or None if not available
+        """
+        from huggingface_hub import HfFileSystem, hf_hub_download
+        
+        fs = HfFileSystem()
+        repo_path = f"datasets/{dataset_url}/"
+        try:
+            candidates = (
+                fs.glob(f"{repo_path}README*.md")
+                + fs.glob(f"{repo_path}dataset_card*.md")
+            )
+            if candidates:
+                # Download into the shared hub cache (HF_HUB_CACHE / HF_HOME)
+                readme_path = hf_hub_download(
+                    dataset_url,
+                    candidates[0][len(repo_path):],
+                    repo_type="dataset"
+                )
+                return _shorten_readme(Path(readme_path).read_text(encoding="utf-8"))
+        except Exception:
+            # The dataset card only enriches the prompt, so it is optional
+            pass
+        return None
+        
+    def _get_sample(self, split):
+        """Get the first instance of a split.
         
+        Args:
+            split (str): Dataset split to sample from
+            
+        Returns:
+            dict: First instance of the split
+        """
+        if self.split is None:
+            return self.data[split][0]
+        if split != self.split:
+            raise ValueError(
+                f"Dataset was loaded for split '{self.split}', not '{split}'"
+            )
+        return next(iter(self.data))
+
     def _clean_code(self, code):
         """Remove markdown code block markers and clean up the code.
         
@@ -53,8 +186,10 @@ class DataViewer:
         """
         # Remove ```python or ``` markers from start and end
         code = code.strip()
-        code = re.sub(r'^```\w*\n', '', code)
-        code = re.sub(r'\n```$', '', code)
+        if code.startswith("```"):
+            code = code.partition("\n")[2]
+        if code.endswith("\n```"):
+            code = code[:-4]
         return code
 
     def _get_viewer_path(self, split="train"):
@@ -68,17 +203,43 @@ class DataViewer:
         """
         return f"view_{self.dataset_name.replace('/', '_')}_{split}.py"
 
+    def _get_cache_path(self, prompt, system_message):
+        """Get the cache path for the code generated for a request.
+        
+        Args:
+            prompt (str): Prompt sent to the language model
+            system_message (str): System message sent to the language model
+            
+        Returns:
+            str: Path to the cached code, keyed by a hash of the request
+        """
+        request = {
+            "model": getattr(self.llm, "model", type(self.llm).__name__),
+            "system_message": system_message,
+            "prompt": prompt,
+        }
+        key = hashlib.blake2b(
+            json.dumps(request, sort_keys=True).encode()
+        ).hexdigest()[:16]
+        return os.path.join(CACHE_DIR, f"{key}.py")
+
     def set_progress_callback(self, callback):
         """Set a callback to be called when long operations complete."""
         self.progress_callback = callback
 
-    def generate_viewer(self, split="train", extra_prompt="", force=False):
+    def set_stream_callback(self, callback):
+        """Set a callback to be called with each chunk of generated code."""
+        self.stream_callback = callback
+
+    def generate_viewer(self, split="train", extra_prompt="", force=False, viewer_exists=None):
         """Generate and save a Streamlit viewer for the dataset.
         
         Args:
             split (str): Dataset split to visualize
             extra_prompt (str): Additional requirements for the visualization
             force (bool): Whether to force regeneration of existing viewer
+            viewer_exists (bool): Whether the viewer file exists, if already
+                known by the caller; checked on disk otherwise
             
         Returns:
             str: Path to the viewer file
@@ -89,16 +250,26 @@ class DataViewer:
             raise ValueError("No language model configured")
         
         viewer_path = self._get_viewer_path(split)
+        if viewer_exists is None:
+            viewer_exists = Path(viewer_path).exists()
         
         # Check if viewer already exists and force is False
-        if os.path.exists(viewer_path) and not force:
+        if viewer_exists and not force:
             print(f"Using existing viewer at {viewer_path}")
             print("Use --force to regenerate the viewer")
             return viewer_path
             
         # Get sample instance and features
-        sample = self.data[split][0]
-        features = {k: str(type(v)) for k, v in sample.items()}
+        sample = self._get_sample(split)
+        # Serialize both as compact JSON objects while walking the sample once
+        features = []
+        example_instance = []
+        for k, v in sample.items():
+            value_type = type(v)
+            key = json.dumps(k, ensure_ascii=False)
+            value = _FORMATTERS.get(value_type, _format_other)(v)
+            features.append(f"{key}:{json.dumps(str(value_type))}")
+            example_instance.append(f"{key}:{json.dumps(value, ensure_ascii=False)}")
         
         # Create base prompt with optional extra requirements
         base_prompt = """Generate a Streamlit Python script to visualize instances from a dataset.
@@ -107,6 +278,9 @@ class DataViewer:
         
         The instance has these features and types: {features}
         
+        An example instance looks like this: {example_instance}
+        {readme}
+        
         Requirements:
         - Create a function called 'display_instance(instance)' that handles the visualization
         - Display all fields appropriately (text, images, audio, etc.)
@@ -121,97 +295,120 @@ class DataViewer:
         Only respond with the raw Python code, no explanations."""
 
         prompt = base_prompt.format(
-            features=json.dumps(features, indent=2),
+            features="{" + ",".join(features) + "}",
+            example_instance="{" + ",".join(example_instance) + "}",
+            readme=f"\nDataset description:\n{self.dataset_readme}\n" if self.dataset_readme else "",
             extra_requirements=f"\nAdditional requirements:\n{extra_prompt}" if extra_prompt else ""
         )
 
         system_message = "You are a Python expert specializing in Streamlit and data visualization. Provide only raw Python code without markdown formatting."
         
-        # Generate code using the configured LLM
-        viewer_code = self._clean_code(
-            self.llm.generate_code(prompt, system_message)
-        )
+        # Reuse a previous response for the exact same request unless forced
+        cache_path = Path(self._get_cache_path(prompt, system_message))
+        if cache_path.exists() and not force:
+            viewer_code = cache_path.read_text(encoding="utf-8")
+        else:
+            # Generate code using the configured LLM, forwarding chunks as they arrive
+            chunks = []
+            for chunk in self.llm.stream_code(prompt, system_message):
+                chunks.append(chunk)
+                if self.stream_callback:
+                    self.stream_callback(chunk)
+            viewer_code = self._clean_code("".join(chunks))
+            
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            cache_path.write_text(viewer_code, encoding="utf-8")
         
         # Signal completion
         if self.progress_callback:
             self.progress_callback()
         
         # Define the viewer template
-        viewer_template = """
+        viewer_template = Template("""
 import streamlit as st
 import random
 from datasets import load_dataset
 
-# Cache the dataset loading
+# Cache the dataset loading, only the visualized split is needed
 @st.cache_resource
-def get_dataset():
-    return load_dataset("{dataset_name}")
+def get_dataset(split):
+    return load_dataset("$dataset_name", split=split)
 
 # Get the dataset
-dataset = get_dataset()
-split = "{split}"
-data = dataset[split]
+split = "$split"
+data = get_dataset(split)
+num_instances = len(data)
 
 # Session state for index tracking
 if 'current_index' not in st.session_state:
     st.session_state.current_index = 0
 
 # Navigation controls
-st.title("Dataset Viewer: {dataset_name}")
+st.title("Dataset Viewer: $dataset_name")
 
 col1, col2, col3, col4 = st.columns([1, 1, 1, 2])
 
 with col1:
     if st.button("⬅️ Previous"):
-        st.session_state.current_index = (st.session_state.current_index - 1) % len(data)
+        st.session_state.current_index = (st.session_state.current_index - 1) % num_instances
 
 with col2:
     if st.button("Random 🎲"):
-        st.session_state.current_index = random.randint(0, len(data) - 1)
+        st.session_state.current_index = random.randint(0, num_instances - 1)
 
 with col3:
     if st.button("Next ➡️"):
-        st.session_state.current_index = (st.session_state.current_index + 1) % len(data)
+        st.session_state.current_index = (st.session_state.current_index + 1) % num_instances
 
 with col4:
     st.session_state.current_index = st.number_input(
         "Go to index", 
         min_value=0, 
-        max_value=len(data) - 1, 
+        max_value=num_instances - 1, 
         value=st.session_state.current_index
     )
 
-st.write(f"Showing instance {{st.session_state.current_index}} of {{len(data) - 1}}")
+st.write(f"Showing instance {st.session_state.current_index} of {num_instances - 1}")
 
 # Get current instance
 instance = data[st.session_state.current_index]
 
-{viewer_code}
+$viewer_code
 
 # Always call display_instance with current instance
 display_instance(instance)
-"""
+""")
         
         # Save the generated viewer
-        with open(viewer_path, "w") as f:
-            f.write(viewer_template.format(
-                dataset_name=self.dataset_name,
-                split=split,
-                viewer_code=viewer_code
-            ))
+        Path(viewer_path).write_text(viewer_template.safe_substitute(
+            dataset_name=self.dataset_name,
+            split=split,
+            viewer_code=viewer_code
+        ))
         
         return viewer_path
         
-    def run_viewer(self, split="train", extra_prompt="", force=False):
+    def run_viewer(self, split="train", extra_prompt="", force=False, viewer_exists=None):
         """Generate and run the Streamlit viewer.
         
         Args:
             split (str): Dataset split to visualize
             extra_prompt (str): Additional requirements for the visualization
             force (bool): Whether to force regeneration of existing viewer
+            viewer_exists (bool): Whether the viewer file exists, if already
+                known by the caller; checked on disk otherwise
         """
-        viewer_path = self.generate_viewer(split, extra_prompt=extra_prompt, force=force)
-        os.system(f"streamlit run {viewer_path}")
+        viewer_path = self.generate_viewer(
+            split, extra_prompt=extra_prompt, force=force, viewer_exists=viewer_exists
+        )
+        
+        # Run Streamlit in this process to avoid a shell and a second interpreter
+        from streamlit.web import cli as stcli
+        stcli.main.main(
+            args=["run", viewer_path],
+            prog_name="streamlit",
+            standalone_mode=False
+        )
 
     def display(self):
         """Display the loaded data."""
@@ -1,51 +1,55 @@
 """Language model interface and implementations."""
-from abc import ABC, abstractmethod
+from typing import Iterator
 
-try:
-    from anthropic import Anthropic
-except ImportError:
-    Anthropic = None
+class LLMInterface:
+    def stream_code(self, prompt: str, system_message: str) -> Iterator[str]:
+        """Generate code based on prompt, yielding text chunks as they arrive."""
+        raise NotImplementedError
 
-try:
-    from openai import OpenAI
-except ImportError:
-    OpenAI = None
-
-class LLMInterface(ABC):
-    @abstractmethod
     def generate_code(self, prompt: str, system_message: str) -> str:
         """Generate code based on prompt."""
-        pass
+        return "".join(self.stream_code(prompt, system_message))
 
 class Claude(LLMInterface):
+    model = "claude-3-7-sonnet-20250219"
+
     def __init__(self, api_key: str):
-        if Anthropic is None:
+        try:
+            from anthropic import Anthropic
+        except ImportError:
             raise ImportError("Anthropic is not installed. Please install it using 'pip install anthropic'.")
         self.client = Anthropic(api_key=api_key)
     
-    def generate_code(self, prompt: str, system_message: str) -> str:
-        response = self.client.messages.create(
-            model="claude-3-7-sonnet-20250219",
+    def stream_code(self, prompt: str, system_message: str) -> Iterator[str]:
+        with self.client.messages.stream(
+            model=self.model,
             max_tokens=1500,
             temperature=0,
             system=system_message,
             messages=[{"role": "user", "content": prompt}]
-        )
-        return response.content[0].text
+        ) as stream:
+            yield from stream.text_stream
 
 class GPT4(LLMInterface):
+    model = "gpt-4o"
+
     def __init__(self, api_key: str):
-        if OpenAI is None:
+        try:
+            from openai import OpenAI
+        except ImportError:
             raise ImportError("OpenAI is not installed. Please install it using 'pip install openai'.")
         self.client = OpenAI(api_key=api_key)
     
-    def generate_code(self, prompt: str, system_message: str) -> str:
+    def stream_code(self, prompt: str, system_message: str) -> Iterator[str]:
         response = self.client.chat.completions.create(
-            model="gpt-4o",
+            model=self.model,
             temperature=0,
+            stream=True,
             messages=[
                 {"role": "system", "content": system_message},
                 {"role": "user", "content": prompt}
             ]
         )
-        return response.choices[0].message.content 
\ No newline at end of file
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content 
\ No newline at end of file